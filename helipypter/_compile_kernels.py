@@ -0,0 +1,36 @@
+'''
+Ahead-of-time compilation of the scalar Numba kernels.
+
+Running this module produces the helipypter_kernels extension next to this file.
+It's an optional, manual step after installing the package (it needs a C compiler).
+When the extension is present, the vehicles module imports the kernels from it,
+which skips the JIT warmup on the first call. Otherwise the same kernels are JIT
+compiled from helipypter.jit.
+
+    $ python -m helipypter._compile_kernels
+'''
+###   Imports   ###
+# Numba stuff
+from numba.pycc import CC
+# Compiled kernels
+from helipypter.jit import _bsfc_horner, _isa
+
+
+
+cc = CC('helipypter_kernels')
+
+
+@cc.export('bsfc_horner', 'f8(f8, f8, f8, f8, f8, f8, f8)')
+def bsfc_horner(p, c0, c1, c2, c3, c4, c5):
+    return _bsfc_horner(p, c0, c1, c2, c3, c4, c5)
+
+
+@cc.export('isa', 'UniTuple(f8, 3)(f8)')
+def isa(alt_m):
+    return _isa(alt_m)
+
+
+
+
+if __name__ == "__main__":
+    cc.compile()
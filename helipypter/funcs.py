@@ -1,175 +1,291 @@
+import functools
+from collections import namedtuple
+
+import numpy as np
 import matplotlib.pyplot as plt
-from matplotlib import __version__ as pltver
 import matplotlib.ticker as ticker
 
 import helipypter.vehicles as vh
 
 
 
-def speed_power_polar(data):
-    '''
-    This function generates a standard speed-power polar plot.
-    Input data must have columns following the standard naming
-    convention of the helicopter class.
-    
-    ie. A dataframe output from the Helicopter.forward_flight method
-    can be directly supplied.
+def standard_axes(ax):
     '''
-    fig, ax = plt.subplots(figsize=(15,9))
-
-    # Add the data and color it
-    ax.plot(data.Airspeed, data.SHP_inst_req, color='orange', label='Installed Power', marker='o', markersize='4')
-    ax.plot(data.Airspeed, data.SHP_uninst, color='green', label='Uninstalled Power', marker='o', markersize='4')
-    ax.legend()
-
-    # Axis labels
-    ax.set_xlabel('Airspeed, $V$ [kts]', fontsize=12)
-    ax.set_ylabel('Engine Power, $P$ [hp]', fontsize=12)
-    ax.set_title('Speed-Power Polar\n', fontsize=18)
-
-    # Move the axis and its label to the top
-    # ax.xaxis.set_label_position('top')
-    # ax.xaxis.tick_top()
+    This function applies the standard tick and grid styling shared by
+    all the plots in this module to an existing axis. Use it to style
+    custom plots the same way (eg. twin axis sweeps).
 
+    :param ax: Axis to be styled
+    :type ax: matplotlib.axes.Axes
+    '''
     # Set the ticks
-    # ax.xaxis.set_major_locator(ticker.FixedLocator([0, 0.1, 0.2, 0.3, 0.4, 0.5, 0.6, 0.7, 0.8, 0.9, 1]))
+    # Locators hold a reference to their axis, so every axis gets its own.
     ax.tick_params(which='minor', width=0.75, length=2.5)
     ax.xaxis.set_minor_locator(ticker.AutoMinorLocator())
     ax.yaxis.set_minor_locator(ticker.AutoMinorLocator())
     ax.tick_params(axis='both', which='both', direction='in')
 
     # Set the grid lines
-    ax.grid(b=True, which='major', linestyle=':')
-    ax.grid(b=True, which='minor', linestyle=':', alpha=0.3)
-    
+    ax.grid(True, which='major', linestyle=':')
+    ax.grid(True, which='minor', linestyle=':', alpha=0.3)
+
+
+def _styled_axes(title, xlabel, ylabel, figsize=(15,9), ax=None):
+    '''
+    This function creates a figure with the standard axis styling shared by
+    all the plots in this module: labels, title, minor ticks, and grid lines.
+    If an existing axis is supplied, it's styled instead of creating a new figure.
+    '''
+    if ax is None:
+        fig, ax = plt.subplots(figsize=figsize)
+    else:
+        fig = ax.figure
+
+    # Axis labels
+    ax.set_xlabel(xlabel, fontsize=12)
+    ax.set_ylabel(ylabel, fontsize=12)
+    ax.set_title(title, fontsize=18)
+
+    standard_axes(ax)
+
     return fig, ax
 
 
-def specific_range(data):
+def speed_power_polar(data, ax=None):
     '''
-    This function generates a standard specific range plot.
+    This function generates a standard speed-power polar plot.
     Input data must have columns following the standard naming
     convention of the helicopter class.
     
-    ie. A dataframe output from the Helicopter.forward_flight method
+    ie. The FFResult (or its dataframe) from the Helicopter.forward_flight method
     can be directly supplied.
+    
+    The plot is drawn on a new figure, unless an existing axis is supplied.
     '''
-    fig, ax = plt.subplots(figsize=(15,9))
+    fig, ax = _styled_axes('Speed-Power Polar\n', 'Airspeed, $V$ [kts]', 'Engine Power, $P$ [hp]', ax=ax)
 
     # Add the data and color it
-    ax.plot(data.Airspeed, data.SR, color='orange', label='Specific Range', marker='o', markersize='4')
+    # Long sweeps only get a marker on about 20 of their points.
+    every = max(1, len(data.Airspeed)//20)
+    ax.plot(data.Airspeed, data.SHP_inst_req, color='orange', label='Installed Power', marker='o', markersize=4, markevery=every)
+    ax.plot(data.Airspeed, data.SHP_uninst, color='green', label='Uninstalled Power', marker='o', markersize=4, markevery=every)
     ax.legend()
+    
+    return fig, ax
 
-    # Axis labels
-    ax.set_xlabel('Airspeed, $V$ [kts]', fontsize=12)
-    ax.set_ylabel('Specific Range, $SR$ [nm/lb]', fontsize=12)
-    ax.set_title('Specific Range Curve\n', fontsize=18)
-
-    # Move the axis and its label to the top
-    # ax.xaxis.set_label_position('top')
-    # ax.xaxis.tick_top()
 
-    # Set the ticks
-    # ax.xaxis.set_major_locator(ticker.FixedLocator([0, 0.1, 0.2, 0.3, 0.4, 0.5, 0.6, 0.7, 0.8, 0.9, 1]))
-    ax.tick_params(which='minor', width=0.75, length=2.5)
-    ax.xaxis.set_minor_locator(ticker.AutoMinorLocator())
-    ax.yaxis.set_minor_locator(ticker.AutoMinorLocator())
-    ax.tick_params(axis='both', which='both', direction='in')
+def specific_range(data, ax=None):
+    '''
+    This function generates a standard specific range plot.
+    Input data must have columns following the standard naming
+    convention of the helicopter class.
+    
+    ie. The FFResult (or its dataframe) from the Helicopter.forward_flight method
+    can be directly supplied.
+    
+    The plot is drawn on a new figure, unless an existing axis is supplied.
+    '''
+    fig, ax = _styled_axes('Specific Range Curve\n', 'Airspeed, $V$ [kts]', 'Specific Range, $SR$ [nm/lb]', ax=ax)
 
-    # Set the grid lines
-    ax.grid(b=True, which='major', linestyle=':')
-    ax.grid(b=True, which='minor', linestyle=':', alpha=0.3)
+    # Add the data and color it
+    ax.plot(data.Airspeed, data.SR, color='orange', label='Specific Range', marker='o', markersize=4)
+    ax.legend()
     
     return fig, ax
 
 
-def roc(data):
+def roc(data, ax=None):
     '''
     This function generates a standard rate of climb plot.
     Input data must have columns following the standard naming
     convention of the helicopter class.
     
-    ie. A dataframe output from the Helicopter.forward_flight method
+    ie. The FFResult (or its dataframe) from the Helicopter.forward_flight method
     can be directly supplied.
+    
+    The plot is drawn on a new figure, unless an existing axis is supplied.
     '''
-    fig, ax = plt.subplots(figsize=(15,9))
+    fig, ax = _styled_axes('Forward Flight Rate of Climb\n', 'Airspeed, $V$ [kts]', 'Rate of Climb, $ROC$ [ft/min]', ax=ax)
 
     # Add the data and color it
-    ax.plot(data.Airspeed, data.ROC, color='orange', label='Rate of Climb', marker='o', markersize='4')
+    ax.plot(data.Airspeed, data.ROC, color='orange', label='Rate of Climb', marker='o', markersize=4)
     ax.legend()
+    
+    return fig, ax
 
-    # Axis labels
-    ax.set_xlabel('Airspeed, $V$ [kts]', fontsize=12)
-    ax.set_ylabel('Rate of Climb, $ROC$ [ft/min]', fontsize=12)
-    ax.set_title('Forward Flight Rate of Climb\n', fontsize=18)
 
-    ax.xaxis.set_minor_locator(ticker.AutoMinorLocator())
-    ax.yaxis.set_minor_locator(ticker.AutoMinorLocator())
-    ax.tick_params(axis='both', which='both', direction='in')
+def env_for(alt) -> vh.Environment:
+    '''
+    This function returns a memoized Environment for an altitude. An Environment only depends
+    on its altitude, and missions revisit a handful of them, so each one is only built once.
 
-    # Set the grid lines
-    ax.grid(b=True, which='major', linestyle=':')
-    ax.grid(b=True, which='minor', linestyle=':', alpha=0.3)
-    
-    return fig, ax
+    The same object is returned on every call, so treat it as read-only.
+
+    :param alt: Altitude [ft]
+    :type alt: float
+
+    :return: Atmospheric properties at the altitude
+    :rtype: :class:`~helipypter.vehicles.Environment`
+    '''
+    # lru_cache keys a lone int apart from the equal float, so altitudes are
+    # converted first for env_for(0) and a mission's 0.0 to share one Environment.
+    return _cached_env(float(alt))
+
+
+@functools.lru_cache(maxsize=None)
+def _cached_env(alt):
+    return vh.Environment(alt)
+
+
+MISSION_FIELDS = ('maneuver', 'altitude', 'duration', 'speed')
+MissionPoint = namedtuple('MissionPoint', MISSION_FIELDS)
+# Record layout of a mission profile held as a numpy structured array.
+# numpy truncates longer maneuver names to 8 characters, build_mission rejects the result.
+MISSION_DTYPE = np.dtype([('maneuver', 'U8'), ('altitude', np.float64),
+                          ('duration', np.float64), ('speed', np.float64)])
+
+
+def build_mission(points) -> dict:
+    '''
+    This function converts a mission profile into columnar (struct-of-arrays) form,
+    with one array per mission point field.
+
+    :param points: Mission points, each one a (maneuver, altitude, duration, speed) sequence or namedtuple,
+        or a structured array with those fields (see :data:`MISSION_DTYPE`).
+    :type points: iterable or numpy.ndarray
+
+    :return: Mission table with 'maneuver', 'altitude', 'duration' and 'speed' arrays
+    :rtype: dict(numpy.ndarray)
+
+    :raises ValueError: If a maneuver is not a key of :data:`MANEUVER_HANDLERS`.
+    '''
+    if isinstance(points, np.ndarray) and points.dtype.names:
+        mission = {'maneuver': points['maneuver'].astype(str),
+                   'altitude': points['altitude'].astype(np.float64),
+                   'duration': points['duration'].astype(np.float64),
+                   'speed': points['speed'].astype(np.float64)}
+    else:
+        columns = list(zip(*points)) or [()]*len(MISSION_FIELDS)
+        maneuver, altitude, duration, speed = columns
+        mission = {'maneuver': np.array(maneuver, dtype=str),
+                   'altitude': np.array(altitude, dtype=np.float64),
+                   'duration': np.array(duration, dtype=np.float64),
+                   'speed': np.array(speed, dtype=np.float64)}
+    # Catch unknown maneuvers here, including names a structured array silently truncated
+    # to fit MISSION_DTYPE, rather than with a KeyError halfway through missionSim.
+    unknown = set(mission['maneuver'].tolist()) - MANEUVER_HANDLERS.keys()
+    if unknown:
+        raise ValueError(f'Unknown maneuvers {sorted(unknown)}, expected one of {list(MANEUVER_HANDLERS)}')
+    return mission
+
+
+# Mission maneuver handlers. Each one takes the helicopter, the altitude, duration and speed of
+# the mission point, and the engine fuel flows [lb/hr] missionSim evaluates up front. It returns the
+# (distance [nm], fuel [lbs]) of the point. The fuel is burned by missionSim, so handlers only change
+# the vehicle when unloading.
+def _idle(heli, altitude, duration, speed, rates):
+    return 0, rates['idle']/60 * duration
+
+
+def _hover(heli, altitude, duration, speed, rates):
+    # Actually calculate the fuel cost for
+    # hovering at an exact weight and altitude
+    data = heli.HOGE(env_for(altitude))
+    return 0, data.sfc*data.SHP_unins*duration/60
+
+
+def _loiter(heli, altitude, duration, speed, rates):
+    return 0, heli.forward_flight_scalar(env_for(altitude), speed)['FF']/60 * duration
+
+
+def _irp(heli, altitude, duration, speed, rates):
+    # IRP is the engine rated limit
+    return 0, rates['IRP']/60 * duration
+
+
+def _mcp(heli, altitude, duration, speed, rates):
+    # MCP is defined as 95% of IRP
+    d = 120*duration/60   # 120 kts has more ROC than 1000 TODO: Calculate this.
+    return d, rates['MCP']/60 * duration
 
 
-def missionSim(heli, mission) -> dict:
+def _flight(heli, altitude, duration, speed, rates):
+    return duration, duration/heli.forward_flight_scalar(env_for(altitude), speed)['SR']
+
+
+def _climb(heli, altitude, duration, speed, rates):
+    # Represents a hover climb/descent NOT @ MCP, at speed [ft/min]
+    # There's no range credit for a "climb" maneuver instead of an "MCP" maneuver.
+    data = heli.HOGE(env_for(altitude), Vroc=speed)
+    return 0, data.sfc*data.SHP_unins*duration/60
+
+
+def _unload(heli, altitude, duration, speed, rates):
+    heli.unload(speed)
+    return 0, rates['idle']/60 * duration
+
+
+# Maneuver name -> handler. Add an entry here to teach missionSim a new maneuver.
+MANEUVER_HANDLERS = {
+    'idle': _idle,
+    'hover': _hover,
+    'loiter': _loiter,
+    'IRP': _irp,
+    'MCP': _mcp,
+    'flight': _flight,
+    'climb': _climb,
+    'unload': _unload,
+}
+
+
+def missionSim(heli, mission, log=None) -> dict:
     '''
     This function runs a helicopter through a mission. For each point, 
     the fuel consumption is evaluated, and the flight distance is evaluated.
+    Maneuvers are looked up in :data:`MANEUVER_HANDLERS`.
 
     :param heli: Helicopter to be analyzed.
     :type heli: :class:`~helipypter.vehicles.Helicopter`
-    :param mission: Mission profile to be analyzed.
-    :type mission: tuple(nametuple)
-
-    :return: Mission data table
-    :rtype: dict
-    '''
-    output = {'dist':[], 'fuel_rem':[], 'fuel_used':[]}
-
-    for point in mission:
-        d = 0
-        if point.maneuver == 'idle':
-            fuel = heli.idle()/60 * point.duration
-            heli.burn(fuel)
-        elif point.maneuver == 'hover':
-            # Actually calculate the fuel cost for
-            # hovering at an exact weight and altitude
-            data = heli.HOGE(vh.Environment(point.altitude))
-            fuel = data['sfc']*data['SHP_unins']*point.duration/60
-            heli.burn(fuel)
-        elif point.maneuver == 'loiter':
-            data = heli.forward_flight(vh.Environment(point.altitude), point.speed)
-            fuel = data.SHP_uninst[0]*data.bsfc[0]/60 * point.duration
-            heli.burn(fuel)
-        elif point.maneuver == 'IRP':
-            # IRP is the engine rated limit
-            sfc = heli.bsfc(100)
-            fuel = sfc*1*heli.pwr_lim/60 * point.duration
-            heli.burn(fuel)
-        elif point.maneuver == 'MCP':
-            # MCP is defined as 95% of IRP
-            sfc = heli.bsfc(95)
-            fuel = sfc*0.95*heli.pwr_lim/60 * point.duration
-            heli.burn(fuel)
-            d = 120*point.duration/60   # 120 kts has more ROC than 1000 TODO: Calculate this.
-        elif point.maneuver == 'flight':
-            data = heli.forward_flight(vh.Environment(point.altitude), point.speed)
-            fuel = point.duration/data.SR[0]
-            heli.burn(fuel)
-            d = point.duration
-        elif point.maneuver == 'unload':
-            heli.unload(point.speed)
-            fuel = heli.idle()/60 * point.duration
-            heli.burn(fuel)
-
-        output['dist'].append(d)
-        output['fuel_rem'].append(heli.GW_fuel)
-        output['fuel_used'].append(fuel)
-
-
-    return output
-
-
+    :param mission: Mission profile to be analyzed, either from :func:`build_mission`, a structured array
+        or a sequence of mission points.
+    :type mission: dict(numpy.ndarray), numpy.ndarray or tuple(nametuple)
+    :param log: Optional callback, called as log(point, fuel, heli) after each point is flown, where point
+        is a :data:`MissionPoint`. Use it to report progress (eg. logging) without copying this loop.
+    :type log: callable
+
+    :return: Mission data table, one array entry per mission point
+    :rtype: dict(numpy.ndarray)
+    '''
+    if not isinstance(mission, dict):
+        mission = build_mission(mission)
+    # Plain Python scalars are cheaper to work with one point at a time than numpy ones.
+    maneuvers, altitudes, durations, speeds = (mission[k].tolist() for k in MISSION_FIELDS)
+
+    n = len(maneuvers)
+    dist = np.empty(n)
+    fuel_rem = np.empty(n)
+    fuel_used = np.empty(n)
+    # The idle and rated fuel flows [lb/hr] only depend on the engine, so they're evaluated once up front.
+    # Hover and flight performance depend on the gross weight, which changes every point, so those
+    # are evaluated by the handlers each time.
+    rates = {'idle': heli.idle(),
+             'IRP': heli.bsfc(100)*1*heli.pwr_lim,
+             'MCP': heli.bsfc(95)*0.95*heli.pwr_lim}
+
+    # The distance and fuel arithmetic of each point stays in the Python handlers on purpose.
+    # Calling a compiled kernel once per point costs more in dispatch and unboxing than the few
+    # multiplies it would save, and the points can't be batched into one kernel call: each point's
+    # fuel flow depends on the gross weight left by the points before it.
+    for i in range(n):
+        handler = MANEUVER_HANDLERS[maneuvers[i]]
+        d, fuel = handler(heli, altitudes[i], durations[i], speeds[i], rates)
+        heli.burn(fuel)
+        if log is not None:
+            log(MissionPoint(maneuvers[i], altitudes[i], durations[i], speeds[i]), fuel, heli)
+
+        dist[i] = d
+        fuel_rem[i] = heli.GW_fuel
+        fuel_used[i] = fuel
+
+
+    return {'dist':dist, 'fuel_rem':fuel_rem, 'fuel_used':fuel_used}
@@ -0,0 +1,294 @@
+###   Imports   ###
+# Default Python stuff
+import math
+# SciPy stuff
+import numpy as np
+# Numba stuff
+from numba import njit, guvectorize, prange
+
+
+
+### Constants
+
+# U.S. 1976 Standard Atmosphere, identical to the values used by sk-aero's COESA model
+_G0 = 9.80665        # [m/s^2]
+_M0 = 28.9644e-3     # [kg/mol]
+_RS = 8.31432        # [N*m/(mol*K)]
+# Base geopotential altitude [m] and temperature lapse rate [K/m] of each layer
+_ISA_H = np.array([0.0, 11000.0, 20000.0, 32000.0, 47000.0, 51000.0, 71000.0])
+_ISA_L = np.array([-6.5e-3, 0.0, 1.0e-3, 2.8e-3, 0.0, -2.8e-3, -2.0e-3])
+
+
+
+### Compiled Kernels
+
+# The numeric hot spots of the Helicopter class live here as module-level functions,
+# so Numba can compile them once (and cache them to disk) instead of running them
+# through the interpreter on every call.
+@njit(cache=True, fastmath=True)
+def _bsfc_horner(p, c0, c1, c2, c3, c4, c5):
+    '''
+    Evaluates the normalized bsfc polynomial in Horner form.
+
+    :param p: Percent power (eg 47%)
+    :type p: float
+    :param c0-c5: Polynomial coefficients, lowest order first.
+    :type c0-c5: float
+
+    :returns: Brake specific fuel consumption (lbs/(hp*hr))
+    :rtype: float
+    '''
+    return c0 + p*(c1 + p*(c2 + p*(c3 + p*(c4 + p*c5))))
+
+
+@guvectorize(['(float64[:], float64, float64, float64, float64, float64, float64, float64[:])'],
+             '(n),(),(),(),(),(),()->(n)', cache=True, fastmath=True)
+def _bsfc_horner_vec(p, c0, c1, c2, c3, c4, c5, out):
+    '''
+    Array twin of :func:`_bsfc_horner`, evaluated over a whole power sweep in one call.
+    '''
+    for i in range(p.shape[0]):
+        out[i] = c0 + p[i]*(c1 + p[i]*(c2 + p[i]*(c3 + p[i]*(c4 + p[i]*c5))))
+
+
+@njit(cache=True, fastmath=True)
+def _glauert(v0, V):
+    '''
+    Glauert's forward flight induced velocity, v0*sqrt(-u^2/2 + sqrt(u^4/4 + 1)) with u = V/v0.
+
+    :param v0: Hover induced velocity (ft/s)
+    :type v0: float
+    :param V: Airspeed (ft/s)
+    :type V: float
+
+    :returns: Induced velocity in forward flight (ft/s)
+    :rtype: float
+    '''
+    # A rotor without thrust has no induced velocity (the limit as v0 goes to zero)
+    if v0 == 0.0:
+        return 0.0
+    x = V/v0
+    x2 = x*x
+    return v0*math.sqrt(-0.5*x2 + math.sqrt(0.25*x2*x2 + 1.0))
+
+
+# Order of the rows returned by _forward_flight_kernel (and of the vehicles.FFResult fields).
+_FF_COLUMNS = ('Airspeed', 'q', 'mu', 'v_if', 'Cts', 'tc', 'tc_lower', 'F', 'del_cds', 'MDD', 'MY90',
+               'del_cdcomp', 'cd', 'Hp_ind', 'Hp_pro', 'Hp_par', 'MR_hp', 'MR_Q', 'T_at', 'L_vt',
+               'TTR', 'D_vt', 'v0_tr', 'v_if_tr', 'HP_i_tr', 'HP_pro_tr', 'TR_hp',
+               'del_MRxsmn', 'del_TRxsmn', 'del_Acc_co', 'SHP_inst_req', 'del_inst', 'SHP_uninst',
+               'L_D', 'Pwr_ratio', 'bsfc', 'FF', 'SR', 'ROC')
+
+
+@njit(cache=True, fastmath=True)
+def _forward_flight_kernel(V_kts, rho, c_sound,
+                           MR_R, MR_A, MR_b, MR_vtip, MR_sol, MR_Omega,
+                           TR_R, TR_sol, TR_cd0, TR_vtip,
+                           GW, download, fe, l_tail, cl_vt, S_vt, AR_vt,
+                           eta_MRxsmn, eta_TRxsmn, eta_xsmn_co, eta_inst, pwr_acc, pwr_lim,
+                           bsfc_0, bsfc_1, bsfc_2, bsfc_3, bsfc_4, bsfc_5):
+    '''
+    Numeric core of Helicopter.forward_flight. All the elementwise math is fused
+    into a single loop over the airspeeds, so no temporary arrays are created.
+
+    V_kts, rho and c_sound must be float64 arrays of the same length.
+
+    :returns: One row per entry of _FF_COLUMNS, one column per airspeed.
+    :rtype: numpy.ndarray
+    '''
+    n = V_kts.shape[0]
+    out = np.empty((len(_FF_COLUMNS), n))
+    Thrust = GW*(1+download)
+    for i in range(n):
+        V = V_kts[i]
+        # Airspeed and its powers in ft/s, 1.68781 is simply the conversion factor from kts
+        V_fps = V * 1.68781
+        V_fps2 = V_fps*V_fps
+        V_fps3 = V_fps2*V_fps
+        ## Main Rotor Calculations
+        ###############################
+        # Dynamic Pressure = 1/2 rho V^2
+        q = 0.5*rho[i]*V_fps2
+        # Advance Ratio
+        mu = V_fps / MR_vtip
+        # Hover Induced Velocity
+        Ct = Thrust/(rho[i]*MR_A*MR_vtip**2)
+        B = 1 - math.sqrt(2*Ct)/MR_b
+        v_0 = math.sqrt(Thrust/(2*rho[i]*math.pi*MR_R**2*B**2))
+        # Induced velocity in Forward Flight, using Glauert's Model
+        v_if = _glauert(v_0, V_fps)
+        # Thrust coef. over solidity
+        Cts = Ct / MR_sol
+        # Blade loading
+        tc = 2*Cts
+        # Empirical lower bound of blade loading
+        tc_lower = -0.6885*Cts + 0.3555
+        # Change in Drag Coef. (due to retreating blade stall)
+        # From a NASA CR
+        F = ((Cts/(1-mu)**2) * (1 + fe*q/GW)) - 0.1376
+        # This value should never be less than zero, so clip it.
+        del_cds = max(18.3*(1-mu)**2*F**3, 0.0)
+        # Mach Drag Divergence of the airfoil: At what Mach would shockwaves start to form?
+        MDD = 0.82 - 2.4*Cts
+        # MY90. Mach at the tip
+        MY90 = (V_fps + MR_vtip)/c_sound[i]
+        # Change in Drag Coef. from compressibility
+        del_cdcomp = 0.2*(MY90 - MDD)**3 + 0.0085*(MY90 - MDD)
+        # Total Drag Coef.
+        cd = 0.00952 + del_cds + del_cdcomp
+        # Induced Horsepower
+        Hp_ind = Thrust*v_if/550
+        # Profile Horsepower
+        Hp_pro = MR_sol*cd*(1+4.65*mu**2)*rho[i]*math.pi*MR_R**2*MR_vtip**3/4400
+        # Parasite Power
+        Hp_par = fe*rho[i]*V_fps3/1100
+        # Main Rotor Horsepower
+        MR_hp = Hp_ind + Hp_pro + Hp_par
+        # Main Rotor Torque
+        MR_Q = 5252*MR_hp/(MR_Omega*60/(2*math.pi))
+
+        ## Tail Rotor Calculations
+        ###############################
+        # Anti-torque Required from Tail Rotor Thrust
+        # MR Torque over the moment arm
+        T_at = MR_Q/l_tail
+        # Calculate the anti-torque provided
+        # by the vertical tail
+        # Lift = cl*wing_area*dynamic_pressure
+        L_vt = cl_vt*S_vt*q
+        # Anti-torque minus Vfin Lift
+        TTR = T_at - L_vt
+        # Induced Drag from the Vfin
+        # There's no Vfin lift (or drag) at zero airspeed, so don't divide by q there.
+        D_vt = L_vt**2/(2*q*S_vt*AR_vt) if q > 0 else 0.0
+        # Calculate the "hover induced velocity" of TR
+        v0_tr = math.sqrt(abs(TTR)/(2*rho[i]*math.pi*TR_R**2))
+        # Calculate the forward flight induced velocity
+        v_if_tr = _glauert(v0_tr, V_fps)
+        # Induced Horsepower
+        HP_i_tr = TTR*v_if_tr/550
+        # Profile Horsepower
+        HP_pro_tr = TR_sol*TR_cd0*(1+4.65*mu**2)*rho[i]*math.pi*TR_R**2*TR_vtip**3 / 4400
+        # Total TR Horsepower
+        TR_hp = HP_i_tr + HP_pro_tr
+
+        ## Engine Calculations
+        ##############################
+        del_MRxsmn = MR_hp*(1-(eta_MRxsmn*eta_xsmn_co))
+        del_TRxsmn = TR_hp*(1-eta_TRxsmn)
+        del_Acc_co = pwr_acc*(1-eta_xsmn_co)
+
+        SHP_inst_req = MR_hp + TR_hp + del_MRxsmn \
+                     + del_TRxsmn + pwr_acc + del_Acc_co
+
+        del_inst = SHP_inst_req*(1-eta_inst)
+        SHP_uninst = SHP_inst_req + del_inst
+        L_D = GW*V_fps / (550*SHP_uninst)
+        Pwr_ratio = 100*SHP_uninst/pwr_lim
+        bsfc = _bsfc_horner(Pwr_ratio, bsfc_0, bsfc_1, bsfc_2, bsfc_3, bsfc_4, bsfc_5)
+        FF = bsfc*SHP_uninst
+        SR = V/FF
+
+        ROC = 550*60*(pwr_lim - SHP_uninst)/GW
+
+        row = (V, q, mu, v_if, Cts, tc, tc_lower, F, del_cds, MDD, MY90,
+               del_cdcomp, cd, Hp_ind, Hp_pro, Hp_par, MR_hp, MR_Q, T_at, L_vt,
+               TTR, D_vt, v0_tr, v_if_tr, HP_i_tr, HP_pro_tr, TR_hp,
+               del_MRxsmn, del_TRxsmn, del_Acc_co, SHP_inst_req, del_inst, SHP_uninst,
+               L_D, Pwr_ratio, bsfc, FF, SR, ROC)
+        for k in range(len(row)):
+            out[k, i] = row[k]
+    return out
+
+
+@njit(parallel=True, fastmath=True, cache=True)
+def _bemt_hover(rho, R, c, Omega, b, a, cd0, theta, n):
+    '''
+    Blade Element Momentum Theory for a hovering rotor with constant chord and no twist.
+    The local inflow at each radial station uses the closed-form BEMT solution, so
+    every station is independent and the stations are evaluated in parallel.
+
+    :param rho: Air density [slug/ft3]
+    :param R: Rotor radius [ft]
+    :param c: Blade chord [ft]
+    :param Omega: Rotor speed [rad/s]
+    :param b: Number of blades
+    :param a: Lift curve slope [cl/rad]
+    :param cd0: Blade section drag coefficient
+    :param theta: Collective pitch [rad]
+    :param n: Number of radial segments
+
+    :returns: r, cl, cd, dT, dQ, one entry per radial segment
+    :rtype: tuple(numpy.ndarray)
+    '''
+    dr = R/n
+    sol = b*c/(math.pi*R)
+    r = np.empty(n)
+    cl = np.empty(n)
+    cd = np.empty(n)
+    dT = np.empty(n)
+    dQ = np.empty(n)
+    for i in prange(n):
+        # Non-dimensional radius at the middle of the segment
+        x = (i + 0.5)/n
+        r[i] = x*R
+        # Local inflow ratio and inflow angle
+        lam = sol*a/16*(math.sqrt(1 + 32*theta*x/(sol*a)) - 1)
+        phi = lam/x
+        cl[i] = a*(theta - phi)
+        cd[i] = cd0
+        # Section lift and drag, resolved into thrust and torque
+        U = Omega*r[i]
+        qc = 0.5*rho*U*U*c*dr
+        dL = qc*cl[i]
+        dD = qc*cd[i]
+        dT[i] = b*(dL*math.cos(phi) - dD*math.sin(phi))
+        dQ[i] = b*(dL*math.sin(phi) + dD*math.cos(phi))*r[i]
+    return r, cl, cd, dT, dQ
+
+
+@njit(cache=True)
+def _isa(alt_m):
+    '''
+    Seven layer U.S. 1976 Standard Atmosphere, up to 84852 m.
+
+    :param alt_m: Geopotential altitude [m]
+    :type alt_m: float
+
+    :returns: Temperature [K], pressure [Pa], density [kg/m3]
+    :rtype: tuple(float, float, float)
+    '''
+    T = 288.15
+    p = 101325.0
+    gmr = _G0*_M0/_RS
+    n = _ISA_H.shape[0]
+    for k in range(n):
+        top = _ISA_H[k+1] if k < n - 1 else np.inf
+        dh = min(alt_m, top) - _ISA_H[k]
+        L = _ISA_L[k]
+        if L == 0.0:
+            # Isothermal layer
+            p = p*math.exp(-gmr*dh/T)
+        else:
+            # Gradient layer
+            T_top = T + L*dh
+            p = p*(T/T_top)**(gmr/L)
+            T = T_top
+        if alt_m <= top:
+            break
+    rho = p*_M0/(_RS*T)
+    return T, p, rho
+
+
+@guvectorize(['(float64[:], float64[:], float64[:], float64[:])'],
+             '(n)->(n),(n),(n)', cache=True)
+def _isa_imperial(alt_ft, T, p, rho):
+    '''
+    Array wrapper of :func:`_isa`, in Imperial units: altitude [ft] in,
+    temperature [Rankine], pressure [psi] and density [slug/ft3] out.
+    '''
+    for i in range(alt_ft.shape[0]):
+        T_K, p_Pa, rho_SI = _isa(alt_ft[i]/3.28084)
+        T[i] = T_K*1.8
+        p[i] = p_Pa/6895
+        rho[i] = rho_SI/515
@@ -3,23 +3,64 @@
 import sys
 import logging
 import math
-import copy
-from dataclasses import dataclass, field, replace
+from dataclasses import dataclass, field, fields, replace
+from collections import namedtuple
+from typing import Union
+from types import SimpleNamespace
 # SciPy stuff
 import numpy as np
 import pandas as pd
-# Sci-Kit Aero stuff
-from skaero.atmosphere import coesa
-from skaero import __version__ as skver
+# Compiled kernels
+from helipypter.jit import _bsfc_horner_vec, _forward_flight_kernel, _FF_COLUMNS, _bemt_hover, _isa_imperial
+try:
+    # Ahead-of-time compiled scalar kernels, if they were built (see _compile_kernels.py)
+    from helipypter.helipypter_kernels import bsfc_horner as _bsfc_horner, isa as _isa
+except ImportError:
+    from helipypter.jit import _bsfc_horner, _isa
 
 
 
 ### Classes
 
+class _KeyedResult():
+    '''
+    Lets a named tuple result also be read like the dictionaries the methods used to return:
+    result['Q'] is result.Q, and unknown keys raise KeyError. Integer indexing is unchanged.
+    '''
+    __slots__ = ()
+    
+    def __getitem__(self, key):
+        if isinstance(key, str):
+            if key in self._fields:
+                return getattr(self, key)
+            raise KeyError(key)
+        return super().__getitem__(key)
+
+
+class HOGEResult(_KeyedResult, namedtuple('HOGEResult', ['a', 'delta_0', 'Ct', 'TR_thrust', 'Cq_i', 'Cq_v', 'Cq_0',
+                                                         'Cq_1', 'Cq_2', 'Cq', 'Q', 'P_MR', 'HP_MR', 'HP_TR',
+                                                         'SHP_ins', 'SHP_unins', 'sfc'])):
+    '''
+    The hover performance returned by Helicopter.HOGE and Helicopter.HIGE.
+    Fields are read by name (result.Q), and result['Q'] still works for code written
+    against the old dictionary output. Use _asdict() to get the dictionary itself.
+    '''
+    __slots__ = ()
+
+
+class BEMTResult(_KeyedResult, namedtuple('BEMTResult', ['theta', 'Ct', 'Cq', 'Q', 'HP_MR', 'stations'])):
+    '''
+    The blade element hover performance returned by Helicopter.HOGE_BEMT.
+    Fields are read by name (result.Q) or key (result['Q']), the same as a HOGEResult.
+    '''
+    __slots__ = ()
+
+
+
 # This cell contains the basic class definition. One the most important classes will be the Helicopter class.
 # This class is the whole purpose of the 'OOP-Conversion' branch, to transition the code to an Object-Oriented
 # Philosophy, which will drastically decrese complexity for funtion calls and scale the capability.
-@dataclass
+@dataclass(slots=True)
 class Helicopter():
     '''
     This class represents a helicopter with typical design features. These features are:
@@ -84,6 +125,25 @@ class Helicopter():
     bsfc_3: float = field(default=-3.77E-05)
     bsfc_4: float = field(default=2.822E-07)
     bsfc_5: float = field(default=-8.331E-10)
+    
+    ## Derived Data
+    # These are calculated in __post_init__, but still need a slot.
+    MR_R: float = field(init=False, repr=False, compare=False)
+    MR_A: float = field(init=False, repr=False, compare=False)
+    MR_vtip: float = field(init=False, repr=False, compare=False)
+    MR_sol: float = field(init=False, repr=False, compare=False)
+    TR_R: float = field(init=False, repr=False, compare=False)
+    TR_A: float = field(init=False, repr=False, compare=False)
+    TR_vtip: float = field(init=False, repr=False, compare=False)
+    TR_sol: float = field(init=False, repr=False, compare=False)
+    _fuel_cap: float = field(init=False, repr=False, compare=False)
+    _payload_cap: float = field(init=False, repr=False, compare=False)
+    
+    # Attributes printed in each section of __str__ (rotor sections include the derived geometry)
+    _MR_KEYS = ('MR_dia', 'MR_b', 'MR_ce', 'MR_Omega', 'MR_cd0', 'MR_R', 'MR_A', 'MR_vtip', 'MR_sol')
+    _TR_KEYS = ('TR_dia', 'TR_b', 'TR_ce', 'TR_Omega', 'TR_cd0', 'TR_R', 'TR_A', 'TR_vtip', 'TR_sol')
+    _AF_KEYS = ('GW_empty', 'GW_fuel', 'GW_payload', 'download', 'HIGE_factor', 'fe', 'l_tail', 'S_vt', 'cl_vt', 'AR_vt')
+    _ENG_KEYS = ('eta_MRxsmn', 'eta_TRxsmn', 'eta_xsmn_co', 'eta_inst', 'xsmn_lim', 'pwr_lim')
 
     
     def __post_init__(self):
@@ -109,33 +169,17 @@ class Helicopter():
         '''
         Human-friendly representation of the helicopter class
         '''
-        out = '-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-\n'
-        out += f'{self.name:^45}'
-        out += f'\nRotors: {self.rotors}'
-        out += '\n-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-'
-        out += '\nMain Rotor Inputs:'
-        for k,v in self.__dict__.items():
-            if k.startswith('MR'):
-                out += '\n{:>17}: {:>7.3f} [{}]'.format(k, v, self.get_units(k))
-                
-        out += '\n-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-'
-        out += '\nTail Rotor Inputs:'
-        for k,v in self.__dict__.items():
-            if k.startswith('TR'):
-                out += '\n{:>17}: {:>7.3f} [{}]'.format(k, v, self.get_units(k))
-                
-        out += '\n-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-'
-        out += '\nAirframe Data:'
-        for k in ['GW_empty', 'GW_fuel', 'GW_payload', 'download', 'HIGE_factor', 'fe', 'l_tail', 'S_vt', 'cl_vt', 'AR_vt']:
-            out += '\n{:>17}: {:>7.3f} [{}]'.format(k, self.__dict__[k], self.get_units(k))
-            
-        out += '\n-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-'
-        out += '\nEngine Data:'
-        for k in ['eta_MRxsmn', 'eta_TRxsmn', 'eta_xsmn_co', 'eta_inst', 'xsmn_lim', 'pwr_lim']:
-            out += '\n{:>17}: {:>7.3f} [{}]'.format(k, self.__dict__[k], self.get_units(k))
-        
-        out += '\n-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-'
-        return out
+        sep = '-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-'
+        parts = [sep, f'{self.name:^45}', f'Rotors: {self.rotors}']
+        for title, keys in (('Main Rotor Inputs:', self._MR_KEYS),
+                            ('Tail Rotor Inputs:', self._TR_KEYS),
+                            ('Airframe Data:', self._AF_KEYS),
+                            ('Engine Data:', self._ENG_KEYS)):
+            parts.append(sep)
+            parts.append(title)
+            parts.extend(f'{k:>17}: {getattr(self, k):>7.3f} [{self.get_units(k)}]' for k in keys)
+        parts.append(sep)
+        return '\n'.join(parts)
                 
     
     def get_units(self, attribute_name) -> str:
@@ -151,18 +195,25 @@ class Helicopter():
         return self.GW_empty + self.GW_fuel + self.GW_payload
     
     
-    def bsfc(self, pwr) -> float:
+    def bsfc(self, pwr) -> Union[float, np.ndarray]:
         '''
         This method uses the normalized bsfc curve (engine specific).
+        Scalar and array powers evaluate the same polynomial, so HOGE, HOGE_sweep
+        and forward_flight all agree on the sfc at a given power.
 
-        :cvar pwr: Percent power (eg 47%)
-        :vartype pwr: float
+        :cvar pwr: Percent power (eg 47%), or an array of them
+        :vartype pwr: float or array_like
 
-        :returns: Brake specific fuel consumption (lbs/(hp*hr))
-        :rtype: float
+        :returns: Brake specific fuel consumption (lbs/(hp*hr)), a float for a scalar power,
+            or a numpy array with one entry per power for an array input
+        :rtype: float or numpy.ndarray
         '''
-        sfc = self.bsfc_0 + self.bsfc_1*pwr + self.bsfc_2*pwr**2 + self.bsfc_3*pwr**3 \
-             + self.bsfc_4*pwr**4 + self.bsfc_5*pwr**5
+        if np.ndim(pwr) == 0:
+            sfc = _bsfc_horner(float(pwr), self.bsfc_0, self.bsfc_1, self.bsfc_2,
+                               self.bsfc_3, self.bsfc_4, self.bsfc_5)
+        else:
+            sfc = _bsfc_horner_vec(np.asarray(pwr, dtype=np.float64), self.bsfc_0, self.bsfc_1,
+                                   self.bsfc_2, self.bsfc_3, self.bsfc_4, self.bsfc_5)
         return sfc
     
     
@@ -186,6 +237,57 @@ class Helicopter():
             self.GW_payload -= weight
 
 
+    def burn_series(self, fuel) -> np.ndarray:
+        '''
+        This method burns a whole series of fuel amounts (eg. one per mission step) at once.
+        The fuel weight is only changed if every step can be flown.
+
+        :returns: Fuel weight remaining after each step
+        :rtype: numpy.ndarray
+        '''
+        remaining = self.GW_fuel - np.cumsum(fuel, dtype=np.float64)
+        if remaining.size and remaining.min() < 0:
+            raise ValueError('More fuel required than remaining!')
+        if remaining.size:
+            self.GW_fuel = float(remaining[-1])
+        return remaining
+
+
+    def unload_series(self, weight) -> np.ndarray:
+        '''
+        This method, similar to burn_series, unloads a whole series of payload weights at once.
+        The payload weight is only changed if every step can be unloaded.
+
+        :returns: Payload weight remaining after each step
+        :rtype: numpy.ndarray
+        '''
+        remaining = self.GW_payload - np.cumsum(weight, dtype=np.float64)
+        if remaining.size and remaining.min() < 0:
+            raise ValueError('More unload payload requested than remaining!')
+        if remaining.size:
+            self.GW_payload = float(remaining[-1])
+        return remaining
+
+
+    def step(self, *, fuel: float = 0.0, payload: float = 0.0) -> 'Helicopter':
+        '''
+        This method returns a new Helicopter with fuel burned and/or payload removed, leaving
+        this one untouched. It's intended for mission-step snapshots in trade studies, and
+        is much cheaper than a copy.deepcopy of the whole vehicle.
+        
+        Fuel and payload capacities carry over, so refuel and reload still work on the snapshot.
+        '''
+        if fuel > self.GW_fuel:
+            raise ValueError('More fuel required than remaining!')
+        if payload > self.GW_payload:
+            raise ValueError('More unload payload requested than remaining!')
+        
+        new = replace(self, GW_fuel=self.GW_fuel-fuel, GW_payload=self.GW_payload-payload)
+        new._fuel_cap = self._fuel_cap
+        new._payload_cap = self._payload_cap
+        return new
+
+
     def reload(self):
         '''
         This method reloads the payload to capacity. Capacity is defined upon vehicle creation.
@@ -207,22 +309,26 @@ class Helicopter():
         bsfc curve)
         
         A ground idle power setting of 20% is assumed by default.
+        An array of power settings returns an array of fuel flows.
         '''
+        if np.ndim(pwr) != 0:
+            pwr = np.asarray(pwr, dtype=np.float64)
         sfc = self.bsfc(pwr)
         burn = sfc*pwr*self.pwr_lim/100
         return burn
     
     
     def HOGE(self,
-             atm,
+             atm: Union['Environment', 'EnvironmentTable'],
              Thrust = None,
              delta_1: float = -0.0216,
              delta_2: float = 0.4,
              k_i: float = 1.1,
              Vroc: float = 0
-            ) -> list:
+            ) -> HOGEResult:
         '''
         This method calculates Hover Out of Ground Effect performance.
+        All of the math is vectorized, so array inputs are allowed (see :meth:`HOGE_sweep`).
 
         :cvar atm: An Environment class object, which provides altitude and temperature.
         :vartype atm: class
@@ -235,8 +341,8 @@ class Helicopter():
         :cvar Vroc: The vertical rate of climb, in ft/min.
         :vartype Vroc: float
             
-        :returns: a, delta_0, Ct, Cq_i, Cq_v, Cq_0, Cq_1, Cq_2, Q, P_MR, P_TR, SHP_ins, SHP_unins
-        :rtype: list(float, float, float, float, float, float, float, float, float, float, float, float, float)
+        :returns: a, delta_0, Ct, TR_thrust, Cq_i, Cq_v, Cq_0, Cq_1, Cq_2, Cq, Q, P_MR, HP_MR, HP_TR, SHP_ins, SHP_unins, sfc
+        :rtype: HOGEResult
         
         :a: 3D lift coefficient [cl/rad]
         :delta_0: corrected, compressible drag coefficient (1st term in 3-term drag equation)
@@ -254,51 +360,66 @@ class Helicopter():
         '''
         # If thrust is not specified (default),
         # Set it to weight plus download
-        if not Thrust:
+        if Thrust is None:
             Thrust = self.GW*(1+self.download)
         
+        # Every input may be an array (see HOGE_sweep), so broadcast them together.
+        rho, c_sound, Thrust, Vroc = np.broadcast_arrays(atm.rho, atm.c_sound, Thrust, Vroc)
+        
         Vroc = Vroc/60   # Convert the climb rate into ft/s for calculations.
         
-        Ct = Thrust/(atm.rho*self.MR_A*self.MR_vtip**2)
+        # Hoist the rotor geometry into locals, it's used over and over below.
+        R = self.MR_R
+        A = self.MR_A
+        b = self.MR_b
+        vtip = self.MR_vtip
+        sol = self.MR_sol
+        TR_A = self.TR_A
+        TR_vtip = self.TR_vtip
+        
+        Ct = Thrust/(rho*A*vtip*vtip)
         
         # Get B correction for tip-loss = 1 - (sqrt(2*Ct)/b)
-        B = 1 - math.sqrt(2*Ct)/self.MR_b
+        B = 1 - np.sqrt(2*Ct)/b
+        # This ratio shows up in three of the torque terms
+        Ct_B2 = Ct/(B*B)
         
         ###   Airfoil Lift factor correction from 2d to 3d   ###
-        AR = 12*self.MR_R/self.MR_ce
-        a_0 = 2*math.pi
-        a = a_0 / (1 + a_0/(math.pi*AR))
+        AR = 12*R/self.MR_ce
+        a_0 = 2*np.pi
+        a = a_0 / (1 + a_0/(np.pi*AR))
         
         ###   Compressibility Correction Factor   ###
-        c_sound = math.sqrt(1.4*1716.4*atm.T)
-        mach_08 = self.MR_vtip*0.8/c_sound
-        delta_0 = self.MR_cd0/math.sqrt(abs(mach_08**2 - 1))
+        mach_08 = vtip*0.8/c_sound
+        # Prandtl-Glauert, clamped so the denominator never reaches zero
+        M2 = mach_08*mach_08
+        delta_0 = self.MR_cd0/np.sqrt(np.maximum(1.0 - M2, 1e-6))
         
         # MR Torque/Power Calculations
-        Cq_i = 0.5*Ct*math.sqrt( (Vroc/(self.MR_Omega*self.MR_R))**2 + 2*Ct/B**2 )
-        Cq_v = Vroc*Ct/(2*self.MR_Omega*self.MR_R)
-        Cq_0 = self.MR_sol*delta_0/8
-        Cq_1 = (2*delta_1/(3*a))*(Ct/B**2)
-        Cq_2 = (4*delta_2/(self.MR_sol*a**2))*(Ct/B**2)**2
+        Cq_i = 0.5*Ct*np.sqrt( (Vroc/vtip)**2 + 2*Ct_B2 )
+        Cq_v = Vroc*Ct/(2*vtip)
+        Cq_0 = sol*delta_0/8
+        Cq_1 = (2*delta_1/(3*a))*Ct_B2
+        Cq_2 = (4*delta_2/(sol*a*a))*Ct_B2*Ct_B2
 
         Cq = Cq_i + Cq_v + Cq_0 + Cq_1 + Cq_2
 
         # TODO: Power estiamte in example seems to use an Area of 935 ft2 instead of 962
         # Using the lifting blade area instead of full blade area is closer to this value.
-        A_temp = math.pi*(B*self.MR_R)**2
-        P_MR = Cq*atm.rho*A_temp*self.MR_vtip**3   # [ft*lbs/s]
+        A_temp = A*B*B
+        P_MR = Cq*rho*A_temp*vtip**3   # [ft*lbs/s]
         HP_MR = P_MR*k_i/550
-        Q = HP_MR*550*self.MR_R/self.MR_vtip    # [lb*ft]
+        Q = HP_MR*550*R/vtip    # [lb*ft]
         
         # TR Torque/Power Calculations
         T_tr = Q/(self.l_tail)      # [lbs]
-        Ct_tr = T_tr/(atm.rho*self.TR_A*self.TR_vtip**2)
-        B_tr = 1 - math.sqrt(2*Ct_tr)/self.TR_b
-        vi_tr = math.sqrt(T_tr/(2*atm.rho*math.pi*self.TR_R**2*B_tr**2))   # [ft/s]
+        Ct_tr = T_tr/(rho*TR_A*TR_vtip*TR_vtip)
+        B_tr = 1 - np.sqrt(2*Ct_tr)/self.TR_b
+        vi_tr = np.sqrt(T_tr/(2*rho*TR_A*B_tr*B_tr))   # [ft/s]
         # Induced horsepower
         HPi_tr = k_i*T_tr*vi_tr/550  # [hp]
         # Profile horsepower
-        HPpro_tr = self.TR_sol*self.TR_cd0*atm.rho*math.pi*self.TR_R**2*self.TR_vtip**3 / 4400   # [hp]
+        HPpro_tr = self.TR_sol*self.TR_cd0*rho*TR_A*TR_vtip**3 / 4400   # [hp]
         HP_TR = HPi_tr + HPpro_tr   # [hp]
         
         # Combine all the required power
@@ -311,31 +432,132 @@ class Helicopter():
         sfc = self.bsfc(100*SHP_unins/self.pwr_lim)
         
         # Warn the user if limits have been exceeded.
-        if SHP_unins > self.pwr_lim:
+        if np.any(SHP_unins > self.pwr_lim):
             logging.warning('Engine Power required to hover is greater than Engine rated limit!')
-        elif SHP_unins > self.xsmn_lim:
+        elif np.any(SHP_unins > self.xsmn_lim):
             logging.warning('Engine Power required to hover is greater than gearbox capability!')
         
-        return {'a':a, 'delta_0':delta_0, 'Ct':Ct, 'TR_thrust':T_tr,
-                'Cq_i':Cq_i, 'Cq_v':Cq_v, 'Cq_0':Cq_0, 'Cq_1':Cq_1, 'Cq_2':Cq_2, 'Cq':Cq,
-                'Q':Q, 'P_MR':P_MR, 'HP_MR':HP_MR,'HP_TR':HP_TR,
-                'SHP_ins':SHP_ins, 'SHP_unins':SHP_unins, 'sfc':sfc}
+        values = np.broadcast_arrays(a, delta_0, Ct, T_tr, Cq_i, Cq_v, Cq_0, Cq_1, Cq_2, Cq,
+                                     Q, P_MR, HP_MR, HP_TR, SHP_ins, SHP_unins, sfc)
+        # Scalar inputs get plain floats back.
+        if rho.ndim == 0:
+            values = [np.asarray(v).item() for v in values]
+        return HOGEResult._make(values)
+    
+    
+    def HOGE_sweep(self,
+                   atm,
+                   Thrust = None,
+                   delta_1: float = -0.0216,
+                   delta_2: float = 0.4,
+                   k_i: float = 1.1,
+                   Vroc = 0
+                  ) -> HOGEResult:
+        '''
+        This method calculates Hover Out of Ground Effect performance over a sweep
+        of altitudes and/or thrusts in one vectorized pass.
+
+        :cvar atm: An EnvironmentTable, or a sequence of Environment class objects, one per point in the sweep.
+        :vartype atm: class
+        :cvar Thrust: Thrust for each point in the sweep (default to weight plus download).
+        :vartype Thrust: array_like
+
+        The remaining inputs are identical to :meth:`HOGE`, and Vroc may also be an array.
+
+        :returns: The same fields as :meth:`HOGE`, with an array of values for each.
+        :rtype: HOGEResult
+        '''
+        if not hasattr(atm, 'rho'):
+            # Stack the individual environments into a single columnar one
+            atm = SimpleNamespace(rho=np.array([env.rho for env in atm]),
+                                  T=np.array([env.T for env in atm]),
+                                  c_sound=np.array([env.c_sound for env in atm]))
+        output = self.HOGE(atm, Thrust, delta_1, delta_2, k_i, np.atleast_1d(Vroc))
+        return HOGEResult._make(np.atleast_1d(v) for v in output)
+    
+    
+    def HOGE_BEMT(self,
+                  atm: 'Environment',
+                  Thrust = None,
+                  n_segments: int = 40,
+                  tol: float = 1e-8,
+                  max_iter: int = 50
+                 ) -> BEMTResult:
+        '''
+        This method calculates Hover Out of Ground Effect performance with Blade Element
+        Momentum Theory, as a higher fidelity alternative to the closed form :meth:`HOGE`.
+        
+        The main rotor is split into radial segments, and the collective pitch is
+        iterated until the integrated thrust matches the required thrust. Blades have
+        constant chord and no twist, and the section drag is the minimum drag (MR_cd0).
+
+        :cvar atm: An Environment class object, which provides altitude and temperature.
+        :vartype atm: class
+        :cvar Thrust: Required thrust (default to weight plus download).
+        :vartype Thrust: float
+        :cvar n_segments: Number of radial segments along the blade.
+        :vartype n_segments: int
+        :cvar tol: Relative tolerance on the thrust coefficient.
+        :vartype tol: float
+        :cvar max_iter: Maximum number of collective pitch iterations, at least 1.
+        :vartype max_iter: int
+        
+        :returns: theta, Ct, Cq, Q, HP_MR, stations
+        :rtype: BEMTResult
+        
+        :theta: Collective pitch [rad]
+        :Ct: coefficient of thrust
+        :Cq: coefficient of torque
+        :Q: Main Rotor Torque [lb*ft]
+        :HP_MR: Main Rotor required Power [hp]
+        :stations: DataFrame of the radial stations (r, cl, cd, dT, dQ)
+        '''
+        if max_iter < 1:
+            raise ValueError('BEMT needs at least one iteration (max_iter >= 1)!')
+        if Thrust is None:
+            Thrust = self.GW*(1+self.download)
+        
+        rho = atm.rho
+        R = self.MR_R
+        c = self.MR_ce/12    # [ft]
+        vtip = self.MR_vtip
+        sol = self.MR_sol
+        # Same 3D lift slope as the closed form solution
+        AR = 12*R/self.MR_ce
+        a = 2*math.pi / (1 + 2/AR)
+        
+        # Start from the uniform inflow estimate of the collective
+        Ct_req = Thrust/(rho*self.MR_A*vtip**2)
+        theta = 6*Ct_req/(sol*a) + 1.5*math.sqrt(Ct_req/2)
+        for _ in range(max_iter):
+            r, cl, cd, dT, dQ = _bemt_hover(rho, R, c, self.MR_Omega, self.MR_b, a, self.MR_cd0, theta, n_segments)
+            Ct = dT.sum()/(rho*self.MR_A*vtip**2)
+            if abs(Ct - Ct_req) < tol*Ct_req:
+                break
+            # dCt/dtheta = sol*a/6 for uniform inflow, which under-relaxes the update
+            theta += 6*(Ct_req - Ct)/(sol*a)
+        else:
+            logging.warning('BEMT collective pitch did not converge!')
+        
+        Q = float(dQ.sum())    # [lb*ft]
+        return BEMTResult(float(theta), float(Ct), Q/(rho*self.MR_A*vtip**2*R), Q, Q*self.MR_Omega/550,
+                          pd.DataFrame({'r':r, 'cl':cl, 'cd':cd, 'dT':dT, 'dQ':dQ}))
     
     
     def HIGE(self,
-             atm,
+             atm: Union['Environment', 'EnvironmentTable'],
              Thrust = None,
              delta_1: float = -0.0216,
              delta_2: float = 0.4,
              k_i: float = 1.1,
              Vroc: float = 0
-            ) -> list:
+            ) -> HOGEResult:
         '''
         This method calculates the Hover In Ground Effect performance.
         
         This is simply the HOGE, but with a factored thrust.
         '''
-        if not Thrust:
+        if Thrust is None:
             Thrust = self.GW*(1+self.download)/self.HIGE_factor
         else:
             Thrust = Thrust/self.HIGE_factor
@@ -344,115 +566,115 @@ class Helicopter():
     
     
     def forward_flight(self,
-                       atm,
+                       atm: Union['Environment', 'EnvironmentTable'],
                        Airspeed
-                      ) -> dict:
+                      ) -> 'FFResult':
         '''
         This function evaluates performance in forward flight.
-        Airspeed (in kts) input can be a single value, or a list of the desired speed sweep.
+        Airspeed (in kts) input can be a single value, or any array-like (list, tuple, numpy array,
+        pandas Series) of the desired speed sweep. A float64 numpy array is the cheapest, it's used as-is.
+        If an EnvironmentTable is supplied, each airspeed is paired with the matching altitude.
         
         Performance metrics such as drag, MR power, TR power, Engine power, fuel
         consumption, and range are evaluated.
         
-        TODO, currently df is returned: A dictionary is returned with keys for each characteristic and
-        a list of outputs as values.
+        An FFResult is returned, with one numpy array per characteristic (one entry per airspeed).
+        Call its to_dataframe method if a pandas DataFrame is wanted.
         '''
-        # Convert airspeed input to a list of a single value, otherwise, pass it on.
-        Airspeed = Airspeed if type(Airspeed) is list else [Airspeed]
-            
-        df = pd.DataFrame(data=Airspeed, columns=['Airspeed'])
-        
-        ## Main Rotor Calculations
-        ###############################
-        # Dynamic Pressure = 1/2 rho V^2
-        df['q'] = 0.5*atm.rho*(df.Airspeed * 1.68781)**2    # 1.689 is simply the conversion factor from kts to ft/s
-        # Advance Ratio
-        df['mu'] = df.Airspeed * 1.689 / self.MR_vtip
-        # Hover Induced Velocity
-        Thrust = self.GW*(1+self.download)
-        Ct = Thrust/(atm.rho*self.MR_A*self.MR_vtip**2)
-        B = 1 - math.sqrt(2*Ct)/self.MR_b
-        v_0 = math.sqrt(Thrust/(2*atm.rho*math.pi*self.MR_R**2*B**2))
-        # Induced velocity in Forward Flight, using Glauert's Model
-        df['v_if'] = v_0 * np.sqrt(-0.5*(1.68781*df.Airspeed/v_0)**2 + np.sqrt((1.68781*df.Airspeed/v_0)**4 / 4 + 1))
-        # Thrust coef. over solidity
-        df['Cts'] = Thrust/(atm.rho*self.MR_A*self.MR_vtip**2) / self.MR_sol
-        # Blade loading
-        df['tc'] = 2*df.Cts
-        # Empirical lower bound of blade loading
-        df['tc_lower'] = -0.6885*df.Cts + 0.3555
-        # Change in Drag Coef. (due to retreating blade stall)
-        # From a NASA CR
-        df['F'] = ((df.Cts/(1-df.mu)**2) * (1 + self.fe*df.q/self.GW)) - 0.1376
-        df['del_cds'] = 18.3*(1-df.mu)**2*df.F**3
-        # This value should never be less than zero, so clip it.
-        df.del_cds.clip(lower=0, inplace=True)
-        # Mach Drag Divergence of the airfoil: At what Mach would shockwaves start to form?
-        df['MDD'] = 0.82 - 2.4*df.Cts
-        # MY90. Mach at the tip
-        c_sound = math.sqrt(1.4*1716.4*atm.T)
-        df['MY90'] = (df.Airspeed*1.68781 + self.MR_vtip)/c_sound
-        # Change in Drag Coef. from compressibility
-        df['del_cdcomp'] = 0.2*(df.MY90 - df.MDD)**3 + 0.0085*(df.MY90 - df.MDD)
-        # Total Drag Coef.
-        df['cd'] = 0.00952 + df.del_cds + df.del_cdcomp
-        # Induced Horsepower
-        df['Hp_ind'] = Thrust*df.v_if/550
-        # Profile Horsepower
-        df['Hp_pro'] = self.MR_sol*df.cd*(1+4.65*df.mu**2)*atm.rho*math.pi*self.MR_R**2*self.MR_vtip**3/4400
-        # Parasite Power
-        df['Hp_par'] = self.fe*atm.rho*(df.Airspeed*1.68781)**3/1100
-        # Main Rotor Horsepower
-        df['MR_hp'] = df.Hp_ind + df.Hp_pro + df.Hp_par
-        # Main Rotor Torque
-        df['MR_Q'] = 5252*df.MR_hp/(self.MR_Omega*60/(2*math.pi))
-        
-        ## Tail Rotor Calculations
-        ###############################
-        # Anti-torque Required from Tail Rotor Thrust
-        # MR Torque over the moment arm
-        df['T_at'] = df.MR_Q/self.l_tail
-        # Calculate the anti-torque provided
-        # by the vertical tail
-        # Lift = cl*wing_area*dynamic_pressure
-        df['L_vt'] = self.cl_vt*self.S_vt*df.q
-        # Anti-torque minus Vfin Lift
-        df['TTR'] = df.T_at - df.L_vt
-        # Induced Drag from the Vfin
-        df['D_vt'] = df.L_vt**2/(2*df.q*self.S_vt*self.AR_vt)
-        # Calculate the "hover induced velocity" of TR
-        df['v0_tr'] = np.sqrt(abs(df.TTR)/(2*atm.rho*math.pi*self.TR_R**2))
-        # Calculate the forward flight induced velocity
-        df['v_if_tr'] = df.v0_tr * np.sqrt(-0.5*(1.68781*df.Airspeed/df.v0_tr)**2 + np.sqrt((1.68781*df.Airspeed/df.v0_tr)**4 / 4 + 1))
-        # Induced Horsepower
-        df['HP_i_tr'] = df.TTR*df.v_if_tr/550
-        # Profile Horsepower
-        df['HP_pro_tr'] = self.TR_sol*self.TR_cd0*(1+4.65*df.mu**2)*atm.rho*math.pi*self.TR_R**2*self.TR_vtip**3 / 4400
-        # Total TR Horsepower
-        df['TR_hp'] = df.HP_i_tr + df.HP_pro_tr
-        
-        ## Engine Calculations
-        ##############################
-        df['del_MRxsmn'] = df.MR_hp*(1-(self.eta_MRxsmn*self.eta_xsmn_co))
-        df['del_TRxsmn'] = df.TR_hp*(1-self.eta_TRxsmn)
-        df['del_Acc_co'] = self.pwr_acc*(1-self.eta_xsmn_co)
-
-        df['SHP_inst_req'] = df.MR_hp + df.TR_hp + df.del_MRxsmn \
-                           + df.del_TRxsmn + self.pwr_acc + df.del_Acc_co
-
-        df['del_inst'] = df.SHP_inst_req*(1-self.eta_inst)
-        df['SHP_uninst'] = df.SHP_inst_req + df.del_inst
-        df['L_D'] = self.GW*df.Airspeed*1.689 / (550*df.SHP_uninst)
-        df['Pwr_ratio'] = 100*df.SHP_uninst/self.pwr_lim
-        df['bsfc'] = self.bsfc_0 + self.bsfc_1*df.Pwr_ratio + self.bsfc_2*df.Pwr_ratio**2                  \
-                   + self.bsfc_3*df.Pwr_ratio**3 + self.bsfc_4*df.Pwr_ratio**4 + self.bsfc_5*df.Pwr_ratio**5
-        df['FF'] = df.bsfc*df.SHP_uninst
-        df['SR'] = df.Airspeed/df.FF
-        
-        df['ROC'] = 550*60*(self.pwr_lim - df.SHP_uninst)/self.GW
-        
-        
-        return df
+        # Any array-like airspeed (or a single value) becomes a 1-D float64 array.
+        V = np.atleast_1d(np.asarray(Airspeed, dtype=np.float64))
+        # The numeric core is compiled, so give it contiguous float64 arrays of equal length.
+        # Inputs that already are (eg. a numpy speed sweep) are passed through without a copy.
+        shape = np.broadcast_shapes(V.shape, np.shape(atm.rho), np.shape(atm.c_sound))
+        V, rho, c_sound = [np.ascontiguousarray(x if np.shape(x) == shape else np.broadcast_to(x, shape),
+                                                dtype=np.float64)
+                           for x in (V, atm.rho, atm.c_sound)]
+        
+        return FFResult(*self._forward_flight_rows(V, rho, c_sound))
+    
+    
+    def forward_flight_scalar(self,
+                              atm: 'Environment',
+                              Airspeed: float
+                             ) -> dict:
+        '''
+        This function is the single-airspeed version of :meth:`forward_flight`, for mission
+        points and other callers that evaluate one flight condition at a time.
+        
+        A dictionary is returned with the same keys as the FFResult attributes, and plain floats as values.
+        '''
+        V = np.array([Airspeed], dtype=np.float64)
+        rho = np.array([atm.rho], dtype=np.float64)
+        c_sound = np.array([atm.c_sound], dtype=np.float64)
+        
+        return dict(zip(_FF_COLUMNS, self._forward_flight_rows(V, rho, c_sound)[:, 0].tolist()))
+    
+    
+    def _forward_flight_rows(self, V, rho, c_sound) -> np.ndarray:
+        '''
+        Runs the compiled forward flight kernel on contiguous float64 arrays of equal length.
+        Returns one row per forward flight characteristic (see FFResult), one column per airspeed.
+        '''
+        return _forward_flight_kernel(V, rho, c_sound,
+                                      self.MR_R, self.MR_A, self.MR_b, self.MR_vtip, self.MR_sol, self.MR_Omega,
+                                      self.TR_R, self.TR_sol, self.TR_cd0, self.TR_vtip,
+                                      self.GW, self.download, self.fe, self.l_tail, self.cl_vt, self.S_vt, self.AR_vt,
+                                      self.eta_MRxsmn, self.eta_TRxsmn, self.eta_xsmn_co, self.eta_inst,
+                                      self.pwr_acc, self.pwr_lim,
+                                      self.bsfc_0, self.bsfc_1, self.bsfc_2, self.bsfc_3, self.bsfc_4, self.bsfc_5)
+    
+    
+
+@dataclass(slots=True)
+class FFResult():
+    '''
+    Forward flight performance, as returned by Helicopter.forward_flight.
+    Every attribute is a numpy array with one entry per airspeed.
+    '''
+    Airspeed: np.ndarray
+    q: np.ndarray
+    mu: np.ndarray
+    v_if: np.ndarray
+    Cts: np.ndarray
+    tc: np.ndarray
+    tc_lower: np.ndarray
+    F: np.ndarray
+    del_cds: np.ndarray
+    MDD: np.ndarray
+    MY90: np.ndarray
+    del_cdcomp: np.ndarray
+    cd: np.ndarray
+    Hp_ind: np.ndarray
+    Hp_pro: np.ndarray
+    Hp_par: np.ndarray
+    MR_hp: np.ndarray
+    MR_Q: np.ndarray
+    T_at: np.ndarray
+    L_vt: np.ndarray
+    TTR: np.ndarray
+    D_vt: np.ndarray
+    v0_tr: np.ndarray
+    v_if_tr: np.ndarray
+    HP_i_tr: np.ndarray
+    HP_pro_tr: np.ndarray
+    TR_hp: np.ndarray
+    del_MRxsmn: np.ndarray
+    del_TRxsmn: np.ndarray
+    del_Acc_co: np.ndarray
+    SHP_inst_req: np.ndarray
+    del_inst: np.ndarray
+    SHP_uninst: np.ndarray
+    L_D: np.ndarray
+    Pwr_ratio: np.ndarray
+    bsfc: np.ndarray
+    FF: np.ndarray
+    SR: np.ndarray
+    ROC: np.ndarray
+    
+    
+    def to_dataframe(self) -> pd.DataFrame:
+        '''Returns the results as a pandas DataFrame, one column per attribute.'''
+        return pd.DataFrame({f.name: getattr(self, f.name) for f in fields(self)})
     
     
 
@@ -462,23 +684,66 @@ class Environment():
     This class contains all the atmospheric data used in performance calculations.
     All atmospheric properties are attributes of this class.
     
-    Depends on sk-aero.coesa module.
+    Uses the U.S. 1976 Standard Atmosphere (compiled, see helipypter.jit).
     Note that only input is the altitude, in feet. All units returned are automatically
     converted from metric to Imperial.
     '''
     alt: float = field(default=0, metadata={'units':'ft'})
     
     def __post_init__(self):
-        # an atmosphere object at a height
-        self.atm = coesa.table(self.alt/3.28084)
+        # an atmosphere table at a height, (h, T, p, rho) in SI units
+        h = self.alt/3.28084
+        self.atm = (h,) + tuple(_isa(h))
         self.T = self.atm[1]*1.8         # [Rankine]
         self.p = self.atm[2]/6895        # [psi]
         self.rho = self.atm[3]/515       # [slug/ft3]
+        # Speed of sound only depends on temperature, so it's computed once here
+        self.c_sound = math.sqrt(1.4*1716.4*self.T)    # [ft/s]
         
+    
+    @classmethod
+    def from_altitudes(cls, alts) -> 'EnvironmentTable':
+        '''Builds the atmosphere for a whole array of altitudes (in feet) at once.'''
+        return EnvironmentTable(alts)
+    
     # TODO: def __str__()
     
 
 
+# A single row of an EnvironmentTable, for callers that only need scalars.
+EnvironmentPoint = namedtuple('EnvironmentPoint', ['alt', 'T', 'p', 'rho', 'c_sound'])
+
+
+@dataclass
+class EnvironmentTable():
+    '''
+    This class is the columnar (struct-of-arrays) version of the Environment class.
+    Rather than one object per altitude, every atmospheric property is stored as a
+    contiguous array, with one entry per altitude.
+    
+    The standard atmosphere is evaluated for the whole table in one compiled call.
+    Input altitudes are in feet, and all units are converted to Imperial, identical
+    to the Environment class.
+    '''
+    alts: np.ndarray = field(default_factory=lambda: np.zeros(1), metadata={'units':'ft'})
+    
+    def __post_init__(self):
+        self.alts = np.atleast_1d(np.asarray(self.alts, dtype=np.float64))
+        # One atmosphere table for every height
+        self.T, self.p, self.rho = _isa_imperial(self.alts)    # [Rankine], [psi], [slug/ft3]
+        self.c_sound = np.sqrt(1.4*1716.4*self.T)    # [ft/s]
+        
+    
+    def __len__(self) -> int:
+        return len(self.alts)
+    
+    
+    def at(self, i) -> EnvironmentPoint:
+        '''Returns the atmospheric properties at a single index of the table.'''
+        return EnvironmentPoint(self.alts[i], self.T[i], self.p[i], self.rho[i], self.c_sound[i])
+    
+
+
 
 if __name__ == "__main__":
     # Logging setup
@@ -492,5 +757,4 @@ if __name__ == "__main__":
     logging.info('Author: Benjamin Crews')
     logging.info('Numpy version: {}'.format(np.version.version))
     logging.info('Pandas version: {}'.format(pd.__version__))
-    logging.info('SciKit-Aero version: {}'.format(skver))
     logging.info('=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=')
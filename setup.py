@@ -13,10 +13,19 @@ setuptools.setup(
     long_description_content_type="text/markdown",
     url="https://github.com/czarified/helipypter",
     packages=setuptools.find_packages(),
+    install_requires=[
+        'numpy>=1.22',
+        'pandas>=1.4',
+        'matplotlib>=3.5',
+        'numba>=0.56',
+    ],
+    extras_require={
+        'test': ['pytest'],
+    },
     classifiers=[
         "Programming Language :: Python :: 3",
         "License :: OSI Approved :: GNU General Public License v3 (GPLv3)",
         "Operating System :: OS Independent",
     ],
-    python_requires='>=3.6',
+    python_requires='>=3.10',
 )
\ No newline at end of file
@@ -1,239 +1,198 @@
-
 import os
 from collections import namedtuple
 import logging
 import numpy as np
+import pandas as pd
+import matplotlib
+# This script only writes image files, so use the non-interactive backend.
+# It has to be selected before anything (including helipypter.funcs) imports pyplot.
+matplotlib.use('Agg')
 import matplotlib.pyplot as plt
-import matplotlib.ticker as ticker
 import helipypter.vehicles as vh
 import helipypter.funcs as func
 
-# Set the CWD to tests dir
-os.chdir('tests')
-
-# Logging setup
-logging.basicConfig(
-    level=logging.INFO,
-    format=' %(asctime)s -  %(levelname)s -  %(message)s',
-    filename='helipypter.out',
-    filemode='w'
-)
-
-
-## Build the Project Helicopter
-heli = vh.Helicopter(name='Project Helicopter Spec',
-                  MR_dia = 35,
-                    MR_b = 4,
-                   MR_ce = 10.4,
-                MR_Omega = 43.2,
-                  MR_cd0 = 0.0080,
-                  TR_dia = 5.42,
-                    TR_b = 4,
-                   TR_ce = 7,
-                TR_Omega = 239.85,
-                  TR_cd0 = 0.015,
-                GW_empty = 2853,
-                 GW_fuel = 869,
-              GW_payload = 1278,
-                download = 0.03,
-                      fe = 12.9,
-                  l_tail = 21.21,
-                    S_vt = 20.92,
-                   cl_vt = 0.22,
-                   AR_vt = 3
-                        )
-logging.info('\n' + heli.__str__())
-logging.info('')
-
-
-## What is the basic hover performance?
-atm = vh.Environment(0)
-logging.info('-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-')
-logging.info('{:^45}'.format('Results - HOGE'))
-logging.info('-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-')
-for k,v in heli.HOGE(atm).items():
-    logging.info('{:>17}:  {:>7.4}'.format(k, v))
-    
-
-logging.info('')
-logging.info('')
-logging.info('-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-')
-logging.info('{:^45}'.format('Results - HIGE'))
-logging.info('-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-')
-for k,v in heli.HIGE(atm).items():
-    logging.info('{:>17}:  {:>7.4}'.format(k, v))
-
-
-## Forward flight performance over the speed sweep
-speeds = list(np.linspace(20, 150, num=27))
-data = heli.forward_flight(atm, speeds)
-
-data.to_excel('SpeedSweep.xlsx')
-
-## Uncomment this section to print all the data to console
-## It's just a dataframe, so it can be printed, stored,
-## saved as text or even as a workbook.
-
-# with pd.option_context('display.max_columns', 100):
-#     print(data.set_index('Airspeed'))
-
-
-## Plot stuff
-fig, ax = func.specific_range(data)
-fig.savefig('Specific_Range.png')
-fig, ax = func.speed_power_polar(data)
-fig.savefig('Speed_Power_Polar.png')
-fig, ax = func.roc(data)
-fig.savefig('Rate_of_Climb.png')
-
-
-fig, ax = plt.subplots(figsize=(15,7))
-
-# Add the data and color it
-ax.plot(data.Airspeed, data.SHP_inst_req, color='orange', label='Installed Power', marker='o', markersize='4')
-ax.plot(data.Airspeed, data.SHP_uninst, color='green', label='Uninstalled Power', marker='o', markersize='4')
-ax.legend()
-
-# Axis labels
-ax.set_xlabel('Airspeed, $V$ [kts]', fontsize=12)
-ax.set_ylabel('Engine Power, $P$ [hp]', fontsize=12)
-
-# Set the ticks
-ax.tick_params(which='minor', width=0.75, length=2.5)
-ax.xaxis.set_minor_locator(ticker.AutoMinorLocator())
-ax.yaxis.set_minor_locator(ticker.AutoMinorLocator())
-ax.tick_params(axis='both', which='both', direction='in')
-
-# Set the grid lines
-ax.grid(b=True, which='major', linestyle=':')
-ax.grid(b=True, which='minor', linestyle=':', alpha=0.3)
-
-ax2 = ax.twinx()
-color = 'darkred'
-ax2.set_ylabel('Rate of Climb, $ROC$ [ft/min]', fontsize=12, color=color)
-ax2.plot(data.Airspeed, data.ROC, color=color, label='Rate of Climb', marker='o', markersize='4')
-ax2.tick_params(labelcolor=color)
-ax2.legend()
-
-ax.set_title('Helicopter Speed Sweep', fontsize=18)
-fig.savefig('testfig.png')
-
-
-## Mission Creation
-
-# A mission is a set of misson points, where each point has: a maneuver, an altitude, and a duration (length/range or time).
-# Maneuver types include: Idle, Hover, MCP, Flight, Load, or Unload
-# Each maneuver type corresponds to a Helicopter class-method.
-Point = namedtuple('MissionPoint', ['maneuver', 'altitude', 'duration', 'speed'])
-startup = Point('idle', 0, 1, 0)
-hover_0 = Point(maneuver='IRP', altitude=0, duration=1, speed=0)
-climb_0 = Point('MCP', 0, 5, 1000)
-cruise_0 = Point('flight', 5000, 160, 110)
-hover_1 = Point('hover', 0, 1, 0)
-loiter = Point('loiter', 5000, 10, 60)
-unload = Point('unload', 0, 5, 1278)
-ground = Point('idle', 0, 1, 0)
-
-
-mission = (startup, hover_0,
-           climb_0, cruise_0, loiter,
-           hover_1, unload, hover_1,
-           climb_0, cruise_0,
-           hover_1, ground
-          )
-
-# GW reset for debugging purposes
-heli.GW_payload = 1278
-heli.GW_fuel = 869
-
-# Mission Loop
-logging.info('')
-logging.info('')
-logging.info('-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-')
-logging.info('{:^45}'.format('Project Spec Mission'))
-logging.info('-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-')
-# Initialize the range tracker
-mission_range = 0
-for point in mission:
-    if point.maneuver == 'idle':
-        fuel = heli.idle()/60 * point.duration
-        heli.burn(fuel)
-        logging.info(f'Idled for {point.duration}[mins].')
-        logging.info(f'   Burned {fuel:.2f}[lbs] of fuel.')
-        logging.info(f'   New GW = {heli.GW:.2f}[lbs], fuel: {heli.GW_fuel:.2f}')
-        logging.info('')
-    
-    elif point.maneuver == 'hover':
-        # Actually calculate the fuel cost for
-        # hovering at an exact weight and altitude
-        data = heli.HOGE(vh.Environment(point.altitude))
-        fuel = data['sfc']*data['SHP_unins']*point.duration/60
-        heli.burn(fuel)
-        logging.info(f'Hovered for {point.duration}[mins], burning {fuel:.2f}[lbs] of fuel.')
-        logging.info(f'   New GW = {heli.GW:.2f}[lbs], fuel: {heli.GW_fuel:.2f}')
-        logging.info('')
-    
-    elif point.maneuver == 'loiter':
-        data = heli.forward_flight(vh.Environment(point.altitude), point.speed)
-        fuel = data.SHP_uninst[0]*data.bsfc[0]/60 * point.duration
-        heli.burn(fuel)
-        logging.info(f'Loitered at {point.speed}[kts] for {point.duration}[mins].')
-        logging.info(f'   Burned {fuel:.2f}[lbs] of fuel.')
-        logging.info(f'   New GW {heli.GW:.2f}[lbs], fuel: {heli.GW_fuel:.2f}')
-        logging.info('')
-    
-    elif point.maneuver == 'IRP':
-        # IRP is the engine rated limit
-        sfc = heli.bsfc(100)
-        fuel = sfc*1*heli.pwr_lim/60 * point.duration
-        heli.burn(fuel)
-        logging.info(f'Ran at IRP for {point.duration}[mins].')
-        logging.info(f'   Burned {fuel:.2f}[lbs] of fuel.')
-        logging.info(f'   New GW = {heli.GW:.2f}[lbs], fuel: {heli.GW_fuel:.2f}')
-        logging.info('')
-    
-    elif point.maneuver == 'MCP':
-        # MCP is defined as 95% of IRP
-        sfc = heli.bsfc(95)
-        fuel = sfc*0.95*heli.pwr_lim/60 * point.duration
-        heli.burn(fuel)
-        logging.info(f'MCP Climb for {point.duration}[mins] @ {point.speed}[ft/min].')
-        logging.info(f'   Burned {fuel:.2f}[lbs] of fuel.')
-        logging.info(f'   New GW = {heli.GW:.2f}[lbs], fuel: {heli.GW_fuel:.2f}')
-        logging.info('')
-        mission_range += 120*point.duration/60   # 120 kts has more ROC than 1000 TODO: Calculate this.
-    
-    elif point.maneuver == 'flight':
-        data = heli.forward_flight(vh.Environment(point.altitude), point.speed)
-        fuel = point.duration/data.SR[0]
-        heli.burn(fuel)
-        logging.info(f'Forward flight for {point.duration}[nm] @ {point.speed}[kts].')
-        logging.info(f'   Burned {fuel:.2f}[lbs] of fuel.')
-        logging.info(f'   New GW = {heli.GW:.2f}[lbs], fuel: {heli.GW_fuel:.2f}')
-        logging.info('')
-        mission_range += point.duration 
-    
-    elif point.maneuver == 'climb':
-        # Represents a hover climb/descent NOT @ MCP
-        # There's no range credit for a "climb" maneuver instead of an "MCP" maneuver.
-        data = heli.HOGE(vh.Environment(point.altitude), Vroc=point.speed)
-        fuel = data['sfc']*data['SHP_unins']*point.duration/60
-        heli.burn(fuel)
-        logging.info(f'Climb for {point.duration}[min] @ {point.speed}[ft/min]')
-        logging.info(f'   Burned {fuel:.2f}[lbs] of fuel.')
-        logging.info(f'   New GW = {heli.GW:.2f}[lbs], fuel: {heli.GW_fuel:.2f}')
-        logging.info('')
-    
-    elif point.maneuver == 'unload':
-        logging.info(f'Landed! Unloading {point.speed}[lbs] of cargo.')
-        heli.unload(point.speed)
-        fuel = heli.idle()/60 * point.duration
-        heli.burn(fuel)
-        logging.info(f'Idled for {point.duration}[mins], burning {fuel:.2f}[lbs] of fuel.')
-        logging.info(f'   New GW = {heli.GW:.2f}[lbs], fuel: {heli.GW_fuel:.2f}')
-        logging.info('')
-        
-logging.info('')
-logging.info(f'Mission Complete! {heli.GW_fuel:.2f} [lbs] of fuel remaining.')
-logging.info(f'Total Range = {mission_range:.2f}[nm]')
-logging.info('-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-')
\ No newline at end of file
+
+# Section separator for the log
+SEP = '-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-'
+
+# What to log for each maneuver, looked up by name like funcs.MANEUVER_HANDLERS.
+# Each message is formatted with the mission point and the fuel it burned.
+POINT_MESSAGES = {
+    'idle': 'Idled for {0.duration:g}[mins].\n   Burned {1:.2f}[lbs] of fuel.',
+    'hover': 'Hovered for {0.duration:g}[mins], burning {1:.2f}[lbs] of fuel.',
+    'loiter': 'Loitered at {0.speed:g}[kts] for {0.duration:g}[mins].\n   Burned {1:.2f}[lbs] of fuel.',
+    'IRP': 'Ran at IRP for {0.duration:g}[mins].\n   Burned {1:.2f}[lbs] of fuel.',
+    'MCP': 'MCP Climb for {0.duration:g}[mins] @ {0.speed:g}[ft/min].\n   Burned {1:.2f}[lbs] of fuel.',
+    'flight': 'Forward flight for {0.duration:g}[nm] @ {0.speed:g}[kts].\n   Burned {1:.2f}[lbs] of fuel.',
+    'climb': 'Climb for {0.duration:g}[min] @ {0.speed:g}[ft/min]\n   Burned {1:.2f}[lbs] of fuel.',
+    'unload': 'Landed! Unloading {0.speed:g}[lbs] of cargo.\nIdled for {0.duration:g}[mins], burning {1:.2f}[lbs] of fuel.',
+}
+
+def log_point(point, fuel, heli):
+    '''Logs each mission point as missionSim flies it, in a single record.'''
+    # Skip the message formatting entirely when INFO is off (eg. Monte-Carlo runs).
+    if not logging.getLogger().isEnabledFor(logging.INFO):
+        return
+    logging.info('%s\n   New GW = %.2f[lbs], fuel: %.2f\n',
+                 POINT_MESSAGES[point.maneuver].format(point, fuel), heli.GW, heli.GW_fuel)
+
+
+def main():
+    # Set the CWD to tests dir
+    os.chdir('tests')
+
+    # Logging setup
+    logging.basicConfig(
+        level=logging.INFO,
+        format=' %(asctime)s -  %(levelname)s -  %(message)s',
+        filename='helipypter.out',
+        filemode='w'
+    )
+
+
+    ## Build the Project Helicopter
+    heli = vh.Helicopter(name='Project Helicopter Spec',
+                      MR_dia = 35,
+                        MR_b = 4,
+                       MR_ce = 10.4,
+                    MR_Omega = 43.2,
+                      MR_cd0 = 0.0080,
+                      TR_dia = 5.42,
+                        TR_b = 4,
+                       TR_ce = 7,
+                    TR_Omega = 239.85,
+                      TR_cd0 = 0.015,
+                    GW_empty = 2853,
+                     GW_fuel = 869,
+                  GW_payload = 1278,
+                    download = 0.03,
+                          fe = 12.9,
+                      l_tail = 21.21,
+                        S_vt = 20.92,
+                       cl_vt = 0.22,
+                       AR_vt = 3
+                            )
+    logging.info('\n%s', heli)
+    logging.info('')
+
+
+    ## What is the basic hover performance?
+    atm = func.env_for(0)
+    logging.info(f'{SEP}\n{"Results - HOGE":^45}\n{SEP}')
+    for k,v in heli.HOGE(atm)._asdict().items():
+        logging.info(f'{k:>17}:  {v:>7.4}')
+
+
+    logging.info('')
+    logging.info('')
+    logging.info(f'{SEP}\n{"Results - HIGE":^45}\n{SEP}')
+    for k,v in heli.HIGE(atm)._asdict().items():
+        logging.info(f'{k:>17}:  {v:>7.4}')
+
+
+    ## Forward flight performance over the speed sweep
+    speeds = np.arange(20.0, 155.0, 5.0)
+    data = heli.forward_flight(atm, speeds)
+
+    data.to_dataframe().to_csv('SpeedSweep.csv', index=False)
+
+    ## Uncomment this section to print all the data to console
+    ## It's just a dataframe, so it can be printed, stored,
+    ## saved as text or even as a workbook.
+
+    # with pd.option_context('display.max_columns', 100):
+    #     print(data.to_dataframe().set_index('Airspeed'))
+
+
+    ## Plot stuff
+    # Let Agg drop line vertices that don't move the path by a whole pixel
+    plt.rcParams['path.simplify_threshold'] = 1.0
+
+    # All four plots share one figure, and are saved together
+    fig, ((ax_sr, ax_spp), (ax_roc, ax)) = plt.subplots(2, 2, figsize=(15, 14))
+    fig.subplots_adjust(hspace=0.3)
+    func.specific_range(data, ax=ax_sr)
+    func.speed_power_polar(data, ax=ax_spp)
+    func.roc(data, ax=ax_roc)
+
+    # Add the data and color it
+    # FFResult columns are already numpy arrays, so they're handed to matplotlib as-is.
+    V = data.Airspeed
+    ax.plot(V, data.SHP_inst_req, color='orange', label='Installed Power', marker='o', markersize=4)
+    ax.plot(V, data.SHP_uninst, color='green', label='Uninstalled Power', marker='o', markersize=4)
+    ax.legend()
+
+    # Axis labels
+    ax.set_xlabel('Airspeed, $V$ [kts]', fontsize=12)
+    ax.set_ylabel('Engine Power, $P$ [hp]', fontsize=12)
+
+    # Standard ticks and grid lines
+    func.standard_axes(ax)
+    # The figure is only saved, so fix the minor ticks instead of locating them on every draw:
+    # one at each sweep speed, and fifths of the major tick spacing for power.
+    ax.set_xticks(speeds, minor=True)
+    ymajor = ax.get_yticks()
+    ylo, yhi = ax.get_ylim()
+    yminor = np.arange(ymajor[0], ymajor[-1], (ymajor[1] - ymajor[0])/5)
+    ax.set_yticks(yminor[(yminor >= ylo) & (yminor <= yhi)], minor=True)
+
+    ax2 = ax.twinx()
+    color = 'darkred'
+    ax2.set_ylabel('Rate of Climb, $ROC$ [ft/min]', fontsize=12, color=color)
+    ax2.plot(V, data.ROC, color=color, label='Rate of Climb', marker='o', markersize=4)
+    ax2.tick_params(labelcolor=color)
+    ax2.legend()
+
+    ax.set_title('Helicopter Speed Sweep', fontsize=18)
+    # The canvas is Agg, so it writes the PNG directly instead of going through savefig
+    fig.canvas.print_png('summary.png')
+
+
+    ## Mission Creation
+
+    # A mission is a set of misson points, where each point has: a maneuver, an altitude, and a duration (length/range or time).
+    # Maneuver types include: Idle, Hover, MCP, Flight, Load, or Unload
+    # Each maneuver type corresponds to a Helicopter class-method.
+    Point = namedtuple('MissionPoint', ['maneuver', 'altitude', 'duration', 'speed'])
+    startup = Point('idle', 0, 1, 0)
+    hover_0 = Point(maneuver='IRP', altitude=0, duration=1, speed=0)
+    climb_0 = Point('MCP', 0, 5, 1000)
+    cruise_0 = Point('flight', 5000, 160, 110)
+    hover_1 = Point('hover', 0, 1, 0)
+    loiter = Point('loiter', 5000, 10, 60)
+    unload = Point('unload', 0, 5, 1278)
+    ground = Point('idle', 0, 1, 0)
+
+
+    # Store the mission as a structured array, then as columns (one array per point field)
+    profile = np.array([startup, hover_0,
+                        climb_0, cruise_0, loiter,
+                        hover_1, unload, hover_1,
+                        climb_0, cruise_0,
+                        hover_1, ground
+                       ], dtype=func.MISSION_DTYPE)
+    mission = func.build_mission(profile)
+
+    # GW reset for debugging purposes
+    heli.GW_payload = 1278
+    heli.GW_fuel = 869
+
+    # Mission Loop
+    logging.info('')
+    logging.info('')
+    logging.info(f'{SEP}\n{"Project Spec Mission":^45}\n{SEP}')
+    output = func.missionSim(heli, mission, log=log_point)
+    mission_range = output['dist'].sum()
+
+    logging.info('')
+    logging.info('Mission Complete! %.2f [lbs] of fuel remaining.', heli.GW_fuel)
+    logging.info('Total Range = %.2f[nm]', mission_range)
+    logging.info(SEP)
+
+    # The whole mission as one table, a row per point
+    summary = pd.DataFrame({**mission, **output})
+    logging.info('\n%s', summary.to_string())
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,163 @@
+import dataclasses
+
+import pytest
+import numpy as np
+import helipypter.vehicles as vh
+import helipypter.funcs as func
+
+
+def test_forward_flight_from_zero_airspeed():
+    # A sweep may start from a hover, where the dynamic pressure is zero.
+    heli = vh.Helicopter()
+    data = heli.forward_flight(vh.Environment(0), [0.0, 20.0])
+    df = data.to_dataframe()
+    assert np.isfinite(df.to_numpy()).all()
+    assert data.D_vt[0] == 0.0
+    assert heli.forward_flight_scalar(vh.Environment(0), 0)['D_vt'] == 0.0
+
+
+def test_bsfc_scalar_matches_array():
+    heli = vh.Helicopter()
+    pwrs = np.linspace(0, 160, 321)
+    sweep = heli.bsfc(pwrs)
+    scalars = [heli.bsfc(p) for p in pwrs]
+    assert all(type(s) is float for s in scalars)
+    assert np.array_equal(sweep, scalars)
+    atm = vh.Environment(0)
+    assert heli.HOGE(atm).sfc == heli.HOGE_sweep([atm]).sfc[0]
+
+
+def test_hoge_bemt_result():
+    heli = vh.Helicopter()
+    atm = vh.Environment(0)
+    result = heli.HOGE_BEMT(atm)
+    assert isinstance(result, vh.BEMTResult)
+    assert result['Q'] == result.Q == result._asdict()['Q']
+    with pytest.raises(ValueError):
+        heli.HOGE_BEMT(atm, max_iter=0)
+
+
+def test_hoge_result_keys():
+    result = vh.Helicopter().HOGE(vh.Environment(0))
+    assert result['Q'] == result.Q
+    assert result[10] == result.Q
+    for key in ('count', 'index', 'nope'):
+        with pytest.raises(KeyError):
+            result[key]
+    assert not hasattr(result, '__dict__')
+
+
+# U.S. 1976 Standard Atmosphere, tabulated at geopotential altitude [m]: T [K], p [Pa], rho [kg/m3]
+US1976 = [
+    (0.0, 288.15, 101325.0, 1.2250),
+    (1524.0, 278.244, 84307.0, 1.05555),    # 5000 ft
+    (11000.0, 216.65, 22632.1, 0.36392),
+    (20000.0, 216.65, 5474.89, 0.088035),
+    (32000.0, 228.65, 868.019, 0.013225),
+]
+
+
+@pytest.mark.parametrize('h, T, p, rho', US1976)
+def test_environment_matches_us1976(h, T, p, rho):
+    atm = vh.Environment(h*3.28084)
+    assert atm.atm[1:] == pytest.approx((T, p, rho), rel=1e-4)
+    # The Imperial attributes use the rounded conversion factors of the Environment class
+    assert atm.T == pytest.approx(T*1.8, rel=1e-4)
+    assert atm.p == pytest.approx(p/6894.757, rel=1e-3)
+    assert atm.rho == pytest.approx(rho/515.379, rel=1e-3)
+
+
+def test_environment_table_matches_scalar():
+    alts = np.array([h for h, *_ in US1976])*3.28084
+    table = vh.Environment.from_altitudes(alts)
+    for i, alt in enumerate(alts):
+        atm = vh.Environment(alt)
+        assert table.at(i) == pytest.approx((alt, atm.T, atm.p, atm.rho, atm.c_sound), rel=1e-12)
+
+
+def test_build_mission_rejects_unknown_maneuvers():
+    with pytest.raises(ValueError):
+        func.build_mission([('idle', 0, 1, 0), ('autorotate', 0, 1, 0)])
+    # Structured arrays truncate long names, which must not slip through as a KeyError later
+    points = np.array([('loitering', 0, 1, 0)], dtype=func.MISSION_DTYPE)
+    with pytest.raises(ValueError):
+        func.build_mission(points)
+
+
+def test_burn_and_unload_series_match_repeated_calls():
+    steps = [12.5, 40.0, 3.25, 100.0]
+    series, single = vh.Helicopter(GW_fuel=500, GW_payload=400), vh.Helicopter(GW_fuel=500, GW_payload=400)
+    remaining = series.burn_series(steps)
+    for i, fuel in enumerate(steps):
+        single.burn(fuel)
+        assert remaining[i] == pytest.approx(single.GW_fuel)
+    assert series.GW_fuel == pytest.approx(single.GW_fuel)
+    remaining = series.unload_series(steps)
+    for i, weight in enumerate(steps):
+        single.unload(weight)
+        assert remaining[i] == pytest.approx(single.GW_payload)
+    assert series.GW_payload == pytest.approx(single.GW_payload)
+    # Nothing changes when a step can't be flown
+    with pytest.raises(ValueError):
+        series.burn_series([100.0, 1000.0])
+    assert series.GW_fuel == pytest.approx(single.GW_fuel)
+
+
+def test_step_leaves_the_original_untouched():
+    heli = vh.Helicopter(GW_fuel=500, GW_payload=400)
+    snap = heli.step(fuel=120, payload=50)
+    assert (heli.GW_fuel, heli.GW_payload) == (500, 400)
+    assert (snap.GW_fuel, snap.GW_payload) == (380, 350)
+    snap.refuel()
+    snap.reload()
+    assert (snap.GW_fuel, snap.GW_payload) == (500, 400)
+    with pytest.raises(ValueError):
+        heli.step(fuel=501)
+
+
+def test_hoge_sweep_matches_scalar_hoge():
+    heli = vh.Helicopter(GW_fuel=500)
+    alts = [0, 2500, 5000, 10000]
+    envs = [vh.Environment(alt) for alt in alts]
+    for sweep in (heli.HOGE_sweep(envs), heli.HOGE_sweep(vh.Environment.from_altitudes(alts))):
+        for i, atm in enumerate(envs):
+            scalar = heli.HOGE(atm)
+            assert [v[i] for v in sweep] == pytest.approx(list(scalar), rel=1e-12)
+
+
+MISSION = [('idle', 0, 1, 0), ('MCP', 0, 5, 1000), ('flight', 5000, 100, 110), ('unload', 0, 5, 200)]
+
+
+def test_build_mission_structured_matches_sequence():
+    columns = func.build_mission(MISSION)
+    structured = func.build_mission(np.array(MISSION, dtype=func.MISSION_DTYPE))
+    assert columns.keys() == structured.keys() == set(func.MISSION_FIELDS)
+    for k in func.MISSION_FIELDS:
+        assert columns[k].dtype == structured[k].dtype
+        assert np.array_equal(columns[k], structured[k])
+    assert columns['maneuver'].tolist() == [p[0] for p in MISSION]
+    assert columns['speed'].dtype == np.float64
+
+
+def test_forward_flight_scalar_matches_sweep_row():
+    heli = vh.Helicopter(GW_fuel=500)
+    atm = vh.Environment(5000)
+    sweep = heli.forward_flight(atm, np.array([40.0, 110.0]))
+    point = heli.forward_flight_scalar(atm, 110)
+    assert list(point) == [f.name for f in dataclasses.fields(sweep)]
+    assert all(type(v) is float for v in point.values())
+    assert point == pytest.approx({k: getattr(sweep, k)[1] for k in point}, rel=1e-12)
+
+
+def test_mission_sim_log_callback():
+    calls = []
+    def log(point, fuel, heli):
+        calls.append((point, fuel, heli.GW_fuel))
+    out = func.missionSim(vh.Helicopter(GW_fuel=800, GW_payload=200), MISSION, log=log)
+    assert [c[0] for c in calls] == [func.MissionPoint(*p) for p in MISSION]
+    assert np.array_equal([c[1] for c in calls], out['fuel_used'])
+    assert np.array_equal([c[2] for c in calls], out['fuel_rem'])
+    # Logging is optional and doesn't change the results
+    quiet = func.missionSim(vh.Helicopter(GW_fuel=800, GW_payload=200), MISSION)
+    for k in out:
+        assert np.array_equal(out[k], quiet[k])